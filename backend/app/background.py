@@ -10,8 +10,7 @@ from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.db import SessionLocal
-from app.models import User, UserRole
-from app import services
+from app.models import User, UserRole, MeterSample
 
 
 def _backfill_last_12h(db: Session, step_minutes: int = 10) -> None:
@@ -30,20 +29,22 @@ def _backfill_last_12h(db: Session, step_minutes: int = 10) -> None:
         .all()
     )
 
+    # This thread stays on the sync Session (services is async for the
+    # request path); it generates its own data, so it can insert directly.
     for u in users:
         ts = start
         while ts <= now:
             # calm, plausible demo ranges
             prod = max(0.0, random.uniform(0.0, 3.0))
             cons = max(0.0, random.uniform(0.6, 2.6))
-            services.record_meter_sample(
-                db=db,
+            db.add(MeterSample(
                 user_id=u.id,
-                prod_kwh=round(prod, 3),
-                cons_kwh=round(cons, 3),
+                production_kwh=round(prod, 3),
+                consumption_kwh=round(cons, 3),
                 ts=ts,
-            )
+            ))
             ts += step
+    db.commit()
 
 
 class MeterSimulator(threading.Thread):
@@ -94,13 +95,13 @@ class MeterSimulator(threading.Thread):
                 production_kwh = max(0.0, random.uniform(0.0, 4.0))     # e.g., solar output
                 consumption_kwh = max(0.0, random.uniform(0.5, 3.5))    # e.g., household usage
 
-                services.record_meter_sample(
-                    db=db,
+                db.add(MeterSample(
                     user_id=u.id,
-                    prod_kwh=round(production_kwh, 3),
-                    cons_kwh=round(consumption_kwh, 3),
+                    production_kwh=round(production_kwh, 3),
+                    consumption_kwh=round(consumption_kwh, 3),
                     ts=now,
-                )
+                ))
+            db.commit()
 
         finally:
             db.close()
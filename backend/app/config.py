@@ -11,6 +11,11 @@ class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./app.db"
     # SQLite for hackathon simplicity.
 
+    # Run Base.metadata.create_all on startup. Handy for dev (zero setup),
+    # but it costs a pile of PRAGMA/introspection round-trips on every boot —
+    # turn it off in production and manage schema via migrations instead.
+    RUN_DDL_ON_STARTUP: bool = True
+
     # -------------------------------------------------------
     # PLATFORM / MARKET CONFIG
     # -------------------------------------------------------
@@ -56,6 +61,13 @@ class Settings(BaseSettings):
     # rather than persisted rows. Simpler and more robust for MVP.
     PROVIDER_VIRTUAL_PRICING: bool = True
 
+    # -------------------------------------------------------
+    # DIAGNOSTICS
+    # -------------------------------------------------------
+    # Per-request DB statement counting with N+1 warnings (see app/query_counter.py).
+    # Off by default; enable in dev/CI to catch query regressions before deploy.
+    DB_QUERY_LOG_ENABLED: bool = False
+
     # -------------------------------------------------------
     # CHAIN INTEGRATION (OPTIONAL, LATER)
     # -------------------------------------------------------
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.config import settings
 
@@ -14,13 +15,24 @@ class Base(DeclarativeBase):
 # SQLite engine (hackathon-friendly: zero setup, single file)
 # check_same_thread=False lets SQLAlchemy share the connection across threads
 # (needed because FastAPI + background threads may touch the DB).
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {},
-    future=True,
-)
+# pool_pre_ping / pool_recycle guard against stale pooled connections; the
+# explicit pool sizing only applies to server databases (Postgres/MySQL).
+_engine_kwargs: dict = {
+    "future": True,
+    "pool_pre_ping": True,
+    "pool_recycle": 3600,
+}
+if settings.DATABASE_URL.startswith("sqlite"):
+    _engine_kwargs["connect_args"] = {"check_same_thread": False}
+else:
+    _engine_kwargs["pool_size"] = 10
+    _engine_kwargs["max_overflow"] = 20
+
+engine = create_engine(settings.DATABASE_URL, **_engine_kwargs)
 
 # Session factory: no autocommit, no autoflush (explicit, predictable behavior)
+# Still used by the background simulator thread and the seeding scripts;
+# the FastAPI request path goes through the async engine below.
 SessionLocal = sessionmaker(
     bind=engine,
     autoflush=False,
@@ -30,21 +42,48 @@ SessionLocal = sessionmaker(
 )
 
 
-def get_db():
+def _async_database_url(url: str) -> str:
+    """Map the configured URL onto its async driver (aiosqlite / asyncpg)."""
+    if url.startswith("sqlite+") or url.startswith("postgresql+"):
+        return url  # driver already explicit
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    return url
+
+
+# Async engine for the request path: I/O waits release the event loop instead
+# of pinning a threadpool worker + connection per in-flight request.
+_async_engine_kwargs: dict = {
+    "pool_pre_ping": True,
+    "pool_recycle": 3600,
+}
+if not settings.DATABASE_URL.startswith("sqlite"):
+    _async_engine_kwargs["pool_size"] = 10
+    _async_engine_kwargs["max_overflow"] = 20
+
+async_engine = create_async_engine(_async_database_url(settings.DATABASE_URL), **_async_engine_kwargs)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+async def get_db():
     """
-    FastAPI dependency that yields a fresh SQLAlchemy Session per request.
+    FastAPI dependency that yields a fresh AsyncSession per request.
 
     Usage in routes:
         from fastapi import Depends
-        from sqlalchemy.orm import Session
+        from sqlalchemy.ext.asyncio import AsyncSession
         from app.db import get_db
 
         @app.get("/offers")
-        def list_offers(db: Session = Depends(get_db)):
+        async def list_offers(db: AsyncSession = Depends(get_db)):
             ...
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -99,6 +99,9 @@ class MeterSample(Base):
         CheckConstraint("production_kwh >= 0.0", name="ck_ms_prod_nonneg"),
         CheckConstraint("consumption_kwh >= 0.0", name="ck_ms_cons_nonneg"),
         Index("ix_meter_samples_ts", "ts"),
+        # /meter/last and /meter/series filter by user and order/range on ts;
+        # the composite index turns those into a seek + bounded range scan.
+        Index("ix_meter_user_ts", "user_id", "ts"),
     )
 
     def __repr__(self) -> str:
@@ -130,7 +133,9 @@ class Offer(Base):
         CheckConstraint("kwh_total > 0.0", name="ck_offer_kwh_total_pos"),
         CheckConstraint("kwh_remaining >= 0.0", name="ck_offer_kwh_remaining_nonneg"),
         CheckConstraint("price_eur_per_kwh > 0.0", name="ck_offer_price_pos"),
-        Index("ix_offers_status_price", "status", "price_eur_per_kwh"),
+        # Matches the market listing query: status filter, then
+        # ORDER BY price ASC, created_ts DESC with a LIMIT.
+        Index("ix_offers_status_price", "status", "price_eur_per_kwh", "created_ts"),
         Index("ix_offers_created_ts", "created_ts"),
     )
 
@@ -167,6 +172,8 @@ class Trade(Base):
         CheckConstraint("kwh > 0.0", name="ck_trade_kwh_pos"),
         CheckConstraint("total_eur >= 0.0", name="ck_trade_total_nonneg"),
         Index("ix_trades_ts", "ts"),
+        # list_trades_for_user filters by buyer and orders by ts DESC
+        Index("ix_trades_buyer_ts", "buyer_id", "ts"),
     )
 
     def __repr__(self) -> str:
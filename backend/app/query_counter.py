@@ -0,0 +1,80 @@
+# backend/app/query_counter.py
+from __future__ import annotations
+
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Per-request thresholds before we warn (tune as the API grows)
+QUERY_WARN_THRESHOLD = 10       # total statements in one request
+DUPLICATE_WARN_THRESHOLD = 3    # same statement template repeated (classic N+1)
+
+# Collapse literals so repeated templates group together
+_STR_RE = re.compile(r"'[^']*'")
+_NUM_RE = re.compile(r"\b\d+\b")
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_ms: float = 0.0
+    templates: Counter = field(default_factory=Counter)
+
+
+# Request-scoped stats; None means counting is off for this context
+_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def _normalize(statement: str) -> str:
+    return _NUM_RE.sub("?", _STR_RE.sub("?", statement))
+
+
+def install(engine: Engine) -> None:
+    """
+    Attach cursor-execute listeners to the engine. Statements executed while a
+    request has called begin_request() are counted and timed; outside a request
+    (background simulator, seeding) the listeners are a no-op.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _stats.get() is not None:
+            conn.info.setdefault("_qc_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stats = _stats.get()
+        if stats is None:
+            return
+        starts = conn.info.get("_qc_start")
+        if starts:
+            stats.total_ms += (time.perf_counter() - starts.pop()) * 1000.0
+        stats.count += 1
+        stats.templates[_normalize(statement)] += 1
+
+
+def begin_request() -> None:
+    """Reset the counter for the current request context."""
+    _stats.set(QueryStats())
+
+
+def finish_request(path: str) -> None:
+    """Log the per-request totals and warn on suspected N+1 patterns."""
+    stats = _stats.get()
+    if stats is None:
+        return
+    print(f"[QueryCounter] path={path} count={stats.count} total_ms={stats.total_ms:.1f}")
+    if stats.count > QUERY_WARN_THRESHOLD:
+        print(f"[QueryCounter] WARNING: {path} issued {stats.count} statements (possible N+1)")
+    for tmpl, n in stats.templates.items():
+        if n > DUPLICATE_WARN_THRESHOLD:
+            first_line = tmpl.strip().splitlines()[0]
+            print(f"[QueryCounter] WARNING: {path} repeated {n}x: {first_line[:120]}")
+    _stats.set(None)
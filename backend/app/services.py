@@ -1,18 +1,20 @@
 # backend/app/services.py
 from __future__ import annotations
 
+import heapq
 import math
 import random
 import time
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Iterable, List, Optional, Tuple
 
-from sqlalchemy import select, func
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from app.config import settings
 from app.models import User, UserRole, MeterSample, Offer, OfferStatus, Trade
-from app.schemas import MarketItemOut, ProviderOfferOut
 
 
 # ============================================================================
@@ -51,99 +53,141 @@ def current_hour_24(ts: Optional[int] = None) -> int:
     return time.localtime(t).tm_hour
 
 
-def provider_multiplier_now(ts: Optional[int] = None) -> float:
+def _build_hour_mult() -> Tuple[float, ...]:
     """
-    Compute the current multiplier from the daily schedule, possibly overridden
-    by the 1-hour 'surge' window (rare peak).
+    Flatten PROVIDER_PRICE_SCHEDULE into an hour -> multiplier table so lookup
+    is a single index instead of a scan over the schedule tuples.
+    Schedule tuples are half-open [start, end); hours not covered default to 1.0.
     """
-    _init_surge_once()
-    hour = current_hour_24(ts)
-
-    # base from schedule
-    m = 1.0
+    table = [1.0] * 24
     for start_h, end_h, mult in settings.PROVIDER_PRICE_SCHEDULE:
-        # schedule tuples are [start_h, end_h) in many systems; we documented (start,end) humanly.
-        # We'll treat them as half-open [start, end) for robust mapping except the last that may end at 24.
-        if start_h <= hour < end_h:
-            m = mult
-            break
+        for h in range(start_h, min(end_h, 24)):
+            table[h] = mult
+    return tuple(table)
+
+
+_HOUR_MULT: Tuple[float, ...] = _build_hour_mult()
+
 
-    # surge override if it matches exactly one hour
+@lru_cache(maxsize=64)
+def _price_for_hour_bucket(bucket: int) -> Tuple[float, float]:
+    """
+    (multiplier, price) for the hour bucket = unix_ts // 3600.
+    The price only changes at hour boundaries (schedule + surge are hourly),
+    so same-hour requests cost a single cache lookup instead of walking the
+    schedule and calling time.localtime.
+    """
+    _init_surge_once()
+    hour = time.localtime(bucket * 3600).tm_hour
+
+    # base from the precompiled hour table, surge override if it matches
+    m = _HOUR_MULT[hour]
     if _SURGE and _SURGE.hour == hour:
         m = _SURGE.multiplier
 
-    return m
+    price = round(settings.PROVIDER_BASE_PRICE_EUR_PER_KWH * m, 4)
+    return m, price
+
+
+def provider_multiplier_now(ts: Optional[int] = None) -> float:
+    """
+    Compute the current multiplier from the daily schedule, possibly overridden
+    by the 1-hour 'surge' window (rare peak).
+    """
+    bucket = (ts if ts is not None else int(time.time())) // 3600
+    return _price_for_hour_bucket(bucket)[0]
 
 
 def provider_price_eur_per_kwh_now(ts: Optional[int] = None) -> float:
     """Base * multiplier, rounded to 4 decimals for stability."""
-    base = settings.PROVIDER_BASE_PRICE_EUR_PER_KWH
-    mult = provider_multiplier_now(ts)
-    return round(base * mult, 4)
+    bucket = (ts if ts is not None else int(time.time())) // 3600
+    return _price_for_hour_bucket(bucket)[1]
 
 
-def list_provider_market_items() -> List[MarketItemOut]:
+@lru_cache(maxsize=128)
+def _provider_items_cached(bucket: int) -> Tuple[dict, ...]:
     """
-    Build in-memory provider 'offers' (virtual entries).
-    These are not DB rows; they are computed each request.
+    Provider 'offers' for an hour bucket. Values only change at hour
+    boundaries, so the dicts are built once per bucket rather than on
+    every /offers request. Shape matches schemas.MarketItemOut.
     """
-    price = provider_price_eur_per_kwh_now()
-    mult = provider_multiplier_now()
-    items: List[MarketItemOut] = []
+    mult, price = _price_for_hour_bucket(bucket)
+    items = []
     for name in settings.PROVIDER_NAMES:
-        items.append(MarketItemOut(
-            kind="provider",
-            virtual_id=f"provider-{name}",
-            provider_name=name,
-            current_multiplier=mult,
-            offer_id=None,
-            seller_id=None,
-            kwh_remaining=None,  # providers are effectively 'infinite' for MVP
-            price_eur_per_kwh=price,
-        ))
-    return items
+        items.append({
+            "kind": "provider",
+            "virtual_id": f"provider-{name}",
+            "provider_name": name,
+            "current_multiplier": mult,
+            "offer_id": None,
+            "seller_id": None,
+            "kwh_remaining": None,  # providers are effectively 'infinite' for MVP
+            "price_eur_per_kwh": price,
+        })
+    return tuple(items)
+
+
+def list_provider_market_items() -> List[dict]:
+    """
+    Build in-memory provider 'offers' (virtual entries).
+    These are not DB rows; they are cached per hour bucket.
+    """
+    return list(_provider_items_cached(int(time.time()) // 3600))
 
 
 # ============================================================================
 # Users, Seed, and Balances
 # ============================================================================
 
-def seed_providers_if_missing(db: Session) -> None:
+async def seed_providers_if_missing(db: AsyncSession) -> None:
     """
     Ensure provider 'users' exist (role='provider'). Idempotent.
     """
-    existing = {u.email for u in db.scalars(
+    existing = {u.email for u in (await db.scalars(
         select(User).where(User.role == UserRole.provider.value)
-    ).all()}
+    )).all()}
     missing = [n for n in settings.PROVIDER_NAMES if n not in existing]
     if not missing:
         return
     for name in missing:
         u = User(email=name, wallet="", role=UserRole.provider.value, balance_eur=0.0)
         db.add(u)
-    db.commit()
-
-
-def create_user(db: Session, email: str, wallet: str, role: str) -> User:
-    user = User(email=email, wallet=wallet, role=role, balance_eur=0.0)
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+
+
+async def create_user(db: AsyncSession, email: str, wallet: str, role: str) -> User:
+    # INSERT ... RETURNING gives back the created row inline (one round-trip
+    # instead of add -> commit -> refresh SELECT); supported on SQLite 3.35+.
+    user = (await db.scalars(
+        insert(User)
+        .values(email=email, wallet=wallet, role=role, balance_eur=0.0)
+        .returning(User)
+    )).one()
+    await db.commit()
     return user
 
 
-def list_users(db: Session) -> List[User]:
-    return db.scalars(select(User).order_by(User.id.asc())).all()
+async def list_users(db: AsyncSession):
+    """
+    Column-level select of all users, ordered by id.
+    Returns lightweight Row objects (attribute access, so UserOut's
+    from_attributes still applies) without ORM hydration or identity-map
+    bookkeeping.
+    """
+    return (await db.execute(
+        select(User.id, User.email, User.wallet, User.role, User.balance_eur)
+        .order_by(User.id.asc())
+    )).all()
 
 
-def fund_user(db: Session, user_id: int, amount: float) -> float:
+async def fund_user(db: AsyncSession, user_id: int, amount: float) -> float:
     if amount <= 0:
         raise ValueError("Amount must be positive")
-    user = db.get(User, user_id)
+    user = await db.get(User, user_id)
     if not user:
         raise ValueError("User not found")
     user.balance_eur = round(user.balance_eur + amount, 4)
-    db.commit()
+    await db.commit()
     return user.balance_eur
 
 
@@ -151,75 +195,104 @@ def fund_user(db: Session, user_id: int, amount: float) -> float:
 # Meter Samples & Surplus
 # ============================================================================
 
-def record_meter_sample(db: Session, user_id: int, prod_kwh: float, cons_kwh: float, ts: int) -> int:
+async def record_meter_sample(db: AsyncSession, user_id: int, prod_kwh: float, cons_kwh: float, ts: int) -> int:
     if prod_kwh < 0 or cons_kwh < 0:
         raise ValueError("Energy values must be non-negative")
-    if not db.get(User, user_id):
+    if not await db.get(User, user_id):
         raise ValueError("User not found")
-    m = MeterSample(user_id=user_id, production_kwh=prod_kwh, consumption_kwh=cons_kwh, ts=ts)
-    db.add(m)
-    db.commit()
-    db.refresh(m)
-    return m.id
+    sample_id = (await db.scalars(
+        insert(MeterSample)
+        .values(user_id=user_id, production_kwh=prod_kwh, consumption_kwh=cons_kwh, ts=ts)
+        .returning(MeterSample.id)
+    )).one()
+    await db.commit()
+    return sample_id
 
 
-def compute_latest_surplus(db: Session, user_id: int) -> float:
+async def compute_latest_surplus(db: AsyncSession, user_id: int) -> float:
     """
     MVP interpretation: surplus = latest production - latest consumption.
     If no samples, surplus = 0.
     """
-    row = db.execute(
+    row = (await db.execute(
         select(MeterSample.production_kwh, MeterSample.consumption_kwh)
         .where(MeterSample.user_id == user_id)
         .order_by(MeterSample.ts.desc())
         .limit(1)
-    ).first()
+    )).first()
     if not row:
         return 0.0
     prod, cons = row
     return round(max(0.0, prod - cons), 4)
 
 
-def compute_surplus_last_hours(db: Session, user_id: int, hours: int = 12) -> float:
+# Per-sample surplus, clipped at zero, for in-DB aggregation
+_SURPLUS_EXPR = case(
+    (MeterSample.production_kwh > MeterSample.consumption_kwh,
+     MeterSample.production_kwh - MeterSample.consumption_kwh),
+    else_=0.0,
+)
+
+
+async def compute_surplus_last_hours(db: AsyncSession, user_id: int, hours: int = 12) -> float:
     """
     Stored surplus over the last {hours} hours:
     Sum of max(0, production - consumption) for each sample in the window.
     """
     now = int(time.time())
     since_ts = now - hours * 3600
-    rows = list_meter_series(db, user_id=user_id, since_ts=since_ts)
-    total = 0.0
-    for (ts, prod, cons) in rows:
-        total += max(0.0, prod - cons)
-    return round(total, 4)
+    # Aggregate in the DB: one scalar comes back instead of every sample row
+    total = (await db.execute(
+        select(func.coalesce(func.sum(_SURPLUS_EXPR), 0.0)).where(
+            MeterSample.user_id == user_id,
+            MeterSample.ts >= since_ts,
+        )
+    )).scalar_one()
+    return round(float(total), 4)
 
 
-def get_user_status(db: Session, user_id: int) -> dict:
+async def _status_row(db: AsyncSession, user_id: int, hours: int = 12) -> Tuple[float, float, float]:
     """
-    Return wallet balance and *available* stored surplus:
-      available = sum_{last 12h} max(0, prod - cons) - active_offers_remaining
+    Fetch (balance_eur, stored_surplus, reserved_kwh) in a single round-trip:
+    the surplus and reservation sums run as scalar subqueries alongside the
+    user row instead of three separate SELECTs.
     """
-    user = db.get(User, user_id)
-    if not user:
+    since_ts = int(time.time()) - hours * 3600
+    stored_sq = (
+        select(func.coalesce(func.sum(_SURPLUS_EXPR), 0.0))
+        .where(MeterSample.user_id == User.id, MeterSample.ts >= since_ts)
+        .scalar_subquery()
+    )
+    reserved_sq = (
+        select(func.coalesce(func.sum(Offer.kwh_remaining), 0.0))
+        .where(Offer.seller_id == User.id, Offer.status == OfferStatus.active.value)
+        .scalar_subquery()
+    )
+    row = (await db.execute(
+        select(User.balance_eur, stored_sq, reserved_sq).where(User.id == user_id)
+    )).one_or_none()
+    if row is None:
         raise ValueError("User not found")
+    balance, stored, reserved = row
+    return float(balance), float(stored), float(reserved)
+
 
-    stored_12h = compute_surplus_last_hours(db, user_id, hours=12)
-    reserved = compute_reserved_surplus_kwh(db, user_id)
+async def get_user_status(db: AsyncSession, user_id: int) -> dict:
+    """
+    Return wallet balance and *available* stored surplus:
+      available = sum_{last 12h} max(0, prod - cons) - active_offers_remaining
+    """
+    balance, stored_12h, reserved = await _status_row(db, user_id, hours=12)
     available = max(0.0, round(stored_12h - reserved, 4))
 
     return {
         "user_id": user_id,
         "stored_surplus_kwh": available,
-        "balance_eur": round(user.balance_eur, 4),
+        "balance_eur": round(balance, 4),
     }
 
-def get_user_status_extended(db: Session, user_id: int) -> dict:
-    user = db.get(User, user_id)
-    if not user:
-        raise ValueError("User not found")
-
-    stored_12h = compute_surplus_last_hours(db, user_id, hours=12)
-    reserved = compute_reserved_surplus_kwh(db, user_id)
+async def get_user_status_extended(db: AsyncSession, user_id: int) -> dict:
+    balance, stored_12h, reserved = await _status_row(db, user_id, hours=12)
     available = max(0.0, round(stored_12h - reserved, 4))
 
     return {
@@ -227,12 +300,12 @@ def get_user_status_extended(db: Session, user_id: int) -> dict:
         "stored_12h_kwh": round(stored_12h, 4),
         "reserved_kwh": round(reserved, 4),
         "available_kwh": available,
-        "balance_eur": round(user.balance_eur, 4),
+        "balance_eur": round(balance, 4),
     }
 
 
 
-def compute_reserved_surplus_kwh(db: Session, user_id: int) -> float:
+async def compute_reserved_surplus_kwh(db: AsyncSession, user_id: int) -> float:
     """
     Sum of kWh that the user has *reserved* in active offers.
     """
@@ -240,7 +313,7 @@ def compute_reserved_surplus_kwh(db: Session, user_id: int) -> float:
         Offer.seller_id == user_id,
         Offer.status == OfferStatus.active.value,
     )
-    reserved = db.execute(q).scalar_one()
+    reserved = (await db.execute(q)).scalar_one()
     return float(round(reserved or 0.0, 4))
 
 
@@ -249,95 +322,117 @@ def compute_reserved_surplus_kwh(db: Session, user_id: int) -> float:
 # Household Offers (user-initiated only)
 # ============================================================================
 
-def create_offer(db: Session, seller_id: int, kwh: float, price_eur_per_kwh: float, ts: Optional[int] = None) -> Offer:
-    seller = db.get(User, seller_id)
+async def create_offer(db: AsyncSession, seller_id: int, kwh: float, price_eur_per_kwh: float, ts: Optional[int] = None) -> Offer:
+    seller = await db.get(User, seller_id)
     if not seller:
         raise ValueError("Seller not found")
     if seller.role not in (UserRole.producer.value, UserRole.both.value):
         raise ValueError("Only producers or both can create offers")
     if kwh <= 0 or price_eur_per_kwh <= 0:
         raise ValueError("kWh and price must be positive")
-    
-    stored_12h = compute_surplus_last_hours(db, seller_id, hours=12)
-    reserved = compute_reserved_surplus_kwh(db, seller_id)
+
+    stored_12h = await compute_surplus_last_hours(db, seller_id, hours=12)
+    reserved = await compute_reserved_surplus_kwh(db, seller_id)
     available = round(stored_12h - reserved, 4)
     if kwh > available + 1e-9:
-        raise ValueError(f"Not enough surplus to sell. Available: {max(0.0, available):.2f} kWh")    
+        raise ValueError(f"Not enough surplus to sell. Available: {max(0.0, available):.2f} kWh")
 
     now = int(time.time()) if ts is None else ts
-    offer = Offer(
-        seller_id=seller_id,
-        kwh_total=round(kwh, 4),
-        kwh_remaining=round(kwh, 4),
-        price_eur_per_kwh=round(price_eur_per_kwh, 4),
-        status=OfferStatus.active.value,
-        created_ts=now,
-    )
-    db.add(offer)
-    db.commit()
-    db.refresh(offer)
+    offer = (await db.scalars(
+        insert(Offer)
+        .values(
+            seller_id=seller_id,
+            kwh_total=round(kwh, 4),
+            kwh_remaining=round(kwh, 4),
+            price_eur_per_kwh=round(price_eur_per_kwh, 4),
+            status=OfferStatus.active.value,
+            created_ts=now,
+        )
+        .returning(Offer)
+    )).one()
+    await db.commit()
     return offer
 
 
-def list_active_household_offers(db: Session, limit: int = 100) -> List[Offer]:
-    return db.scalars(
-        select(Offer)
+async def list_active_household_offers(db: AsyncSession, limit: int = 100):
+    """
+    Column-level select of the fields the marketplace actually renders.
+    Returns Row objects (attribute access) instead of hydrated Offer instances.
+    """
+    return (await db.execute(
+        select(Offer.id, Offer.seller_id, Offer.kwh_remaining, Offer.price_eur_per_kwh)
         .where(Offer.status == OfferStatus.active.value, Offer.kwh_remaining > 0.0)
         .order_by(Offer.price_eur_per_kwh.asc(), Offer.created_ts.desc())
         .limit(limit)
-    ).all()
+    )).all()
 
 
 # ============================================================================
 # Unified Marketplace (providers + household offers)
 # ============================================================================
 
-def list_market_items(db: Session, limit_household: int = 100) -> List[MarketItemOut]:
+async def list_market_items(db: AsyncSession, limit_household: int = 100) -> List[dict]:
     """
-    Returns a mixed list:
+    Returns a mixed list of dicts shaped like schemas.MarketItemOut:
       - Provider virtual items (computed price_now)
       - Household offers from DB
-    Frontend renders one list using 'kind' field.
+    Frontend renders one list using 'kind' field. Plain dicts skip the
+    per-item pydantic construction + revalidation on the hottest endpoint.
     """
-    items: List[MarketItemOut] = []
-
-    # Providers (virtual)
+    # Providers (virtual, cached per hour; all share one price so already sorted)
+    provider_items: List[dict] = []
     if settings.PROVIDER_VIRTUAL_PRICING:
-        items.extend(list_provider_market_items())
-
-    # Household offers (DB)
-    offers = list_active_household_offers(db, limit=limit_household)
-    for o in offers:
-        items.append(MarketItemOut(
-            kind="household",
-            virtual_id=None,
-            provider_name=None,
-            current_multiplier=None,
-            offer_id=o.id,
-            seller_id=o.seller_id,
-            kwh_remaining=o.kwh_remaining,
-            price_eur_per_kwh=o.price_eur_per_kwh,
-        ))
-
-    # Sort overall by price ascending so providers anchor the market visually
-    items.sort(key=lambda it: it.price_eur_per_kwh)
-    return items
+        provider_items = list_provider_market_items()
+
+    # Household offers (DB, already ordered by price ASC)
+    household_items = (
+        {
+            "kind": "household",
+            "virtual_id": None,
+            "provider_name": None,
+            "current_multiplier": None,
+            "offer_id": o.id,
+            "seller_id": o.seller_id,
+            "kwh_remaining": o.kwh_remaining,
+            "price_eur_per_kwh": o.price_eur_per_kwh,
+        }
+        for o in await list_active_household_offers(db, limit=limit_household)
+    )
+
+    # Both inputs are price-sorted, so a linear merge keeps the overall
+    # price-ascending order without an O(n log n) sort per request
+    return list(heapq.merge(provider_items, household_items, key=lambda it: it["price_eur_per_kwh"]))
 
 
 # ============================================================================
 # Accepting an Offer (buy) — atomic update with platform fee
 # ============================================================================
 
-def accept_offer(db: Session, buyer_id: int, offer_id: int, kwh: float, tx_hash: Optional[str] = None):
+async def accept_offer(db: AsyncSession, buyer_id: int, offer_id: int, kwh: float, tx_hash: Optional[str] = None):
     if kwh <= 0:
         raise ValueError("kWh must be positive")
 
-    buyer = db.get(User, buyer_id)
-    if not buyer:
-        raise ValueError("Buyer not found")
+    # Load offer + buyer + seller in one round-trip instead of three db.get's.
+    # with_for_update locks the rows so two concurrent buyers can't both read
+    # the full kwh_remaining and oversubscribe the offer (FOR UPDATE on
+    # PostgreSQL/MySQL; SQLite serializes writers anyway, so it's a no-op there).
+    Buyer = aliased(User)
+    Seller = aliased(User)
+    row = (await db.execute(
+        select(Offer, Buyer, Seller)
+        .join(Seller, Seller.id == Offer.seller_id)
+        .join(Buyer, Buyer.id == buyer_id)
+        .where(Offer.id == offer_id)
+        .with_for_update()
+    )).one_or_none()
+    if row is None:
+        # Cold failure path: re-check which side is missing for a precise error
+        if not await db.get(User, buyer_id):
+            raise ValueError("Buyer not found")
+        raise ValueError("Offer not available")
 
-    offer = db.get(Offer, offer_id)
-    if not offer or offer.status != OfferStatus.active.value:
+    offer, buyer, seller = row
+    if offer.status != OfferStatus.active.value:
         raise ValueError("Offer not available")
 
     if offer.seller_id == buyer_id:
@@ -355,50 +450,51 @@ def accept_offer(db: Session, buyer_id: int, offer_id: int, kwh: float, tx_hash:
 
     # Apply settlement
     buyer.balance_eur = round(buyer.balance_eur - cost, 4)
-    seller = db.get(User, offer.seller_id)
     seller.balance_eur = round(seller.balance_eur + cost, 4)
 
     offer.kwh_remaining = round(offer.kwh_remaining - qty, 4)
     if offer.kwh_remaining <= 1e-9:
         offer.kwh_remaining = 0.0
-        offer.status = OfferStatus.completed.value
+        offer.status = OfferStatus.closed.value
 
-    # Create trade record (what the FE expects back)
+    # Create trade record (what the FE expects back); buyer/seller/offer are
+    # already session-tracked, so the commit flushes their updates too.
     now_ts = int(time.time())
-    tr = Trade(
-        buyer_id=buyer_id,
-        offer_id=offer.id,
-        kwh=qty,
-        total_eur=cost,
-        ts=now_ts,
-        tx_hash=tx_hash,
-    )
-
-    db.add_all([buyer, seller, offer, tr])
-    db.commit()
-    db.refresh(tr)
+    tr = (await db.scalars(
+        insert(Trade)
+        .values(
+            buyer_id=buyer_id,
+            offer_id=offer.id,
+            kwh=qty,
+            total_eur=cost,
+            ts=now_ts,
+            tx_hash=tx_hash,
+        )
+        .returning(Trade)
+    )).one()
+    await db.commit()
 
     # Return the ORM object; FastAPI will serialize to TradeOut
     return tr
 
-def list_trades_for_user(db: Session, user_id: int, limit: int = 50) -> List[Trade]:
-    return db.scalars(
+async def list_trades_for_user(db: AsyncSession, user_id: int, limit: int = 50) -> List[Trade]:
+    return (await db.scalars(
         select(Trade)
         .where(Trade.buyer_id == user_id)
         .order_by(Trade.ts.desc())
         .limit(limit)
-    ).all()
-    
+    )).all()
+
 
-def list_meter_series(db: Session, user_id: int, since_ts: int) -> List[Tuple[int, float, float]]:
+async def list_meter_series(db: AsyncSession, user_id: int, since_ts: int) -> List[Tuple[int, float, float]]:
     """
     Return [(ts, production_kwh, consumption_kwh)] ascending by ts for user since 'since_ts'.
     """
-    rows = db.execute(
+    rows = (await db.execute(
         select(MeterSample.ts, MeterSample.production_kwh, MeterSample.consumption_kwh)
         .where(MeterSample.user_id == user_id, MeterSample.ts >= since_ts)
         .order_by(MeterSample.ts.asc())
-    ).all()
+    )).all()
     # rows: List[Row(tuple)], convert to plain tuples
     return [(int(ts), float(prod), float(cons)) for (ts, prod, cons) in rows]
 
@@ -409,13 +505,15 @@ def provider_series_past_hours(hours: int) -> List[Tuple[int, float]]:
     using the existing schedule + optional surge window.
     Returns [(ts, price_eur_per_kwh)] with ts at the start of each hour.
     """
+    _init_surge_once()
     now = int(time.time())
     # Align to current hour start
     hour_start = now - (now % 3600)
-    out: List[Tuple[int, float]] = []
-    for i in range(hours - 1, -1, -1):
-        ts = hour_start - i * 3600
-        price = provider_price_eur_per_kwh_now(ts)
-        out.append((ts, float(price)))
-    return out
-
+    base = settings.PROVIDER_BASE_PRICE_EUR_PER_KWH
+    ts_list = [hour_start - i * 3600 for i in range(hours - 1, -1, -1)]
+    hours_arr = [time.localtime(ts).tm_hour for ts in ts_list]
+    # Index straight into the precompiled table instead of a priced call per point
+    return [
+        (ts, round(base * (_SURGE.multiplier if _SURGE and _SURGE.hour == h else _HOUR_MULT[h]), 4))
+        for ts, h in zip(ts_list, hours_arr)
+    ]
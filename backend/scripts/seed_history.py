@@ -2,17 +2,18 @@
 import os
 import sys
 import time
-import random
+
+import numpy as np
 
 # Allow "app.*" imports when running from backend/
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.db import SessionLocal
-from app.models import User, UserRole
-from app import services
+from app.models import User, UserRole, MeterSample
 
 HOURS = 12
 STEP_SECONDS = 5 * 60  # 5 minutes
+INSERT_BATCH_SIZE = 5000  # bound memory when seeding many users
 
 def main():
     now = int(time.time())
@@ -27,21 +28,45 @@ def main():
             return
 
         print(f"Seeding {HOURS}h of history every 5 minutes for {len(users)} users...")
-        ts = start
-        while ts <= now:
-            hour = time.localtime(ts).tm_hour
-            daylight = 8 <= hour <= 18  # day-time hours
 
-            for u in users:
-                base_prod = random.uniform(0.2, 1.2) if daylight else random.uniform(0.0, 0.2)
-                base_cons = random.uniform(0.4, 0.9) if daylight else random.uniform(0.2, 0.6)
+        # Vectorized sample generation: one RNG draw per column shaped
+        # (steps, users) instead of 4 random.uniform calls per sample.
+        # Local hours come from pure integer arithmetic — a single localtime
+        # call for the UTC offset instead of one per timestamp (the offset is
+        # constant across a 12h window except on a DST boundary, which is
+        # irrelevant for synthetic demo data).
+        ts_array = np.arange(start, now + 1, STEP_SECONDS, dtype=np.int64)
+        utc_offset = time.localtime(start).tm_gmtoff
+        hours = ((ts_array + utc_offset) // 3600) % 24
+        daylight = ((hours >= 8) & (hours <= 18))[:, None]  # day-time hours
+
+        rng = np.random.default_rng()
+        shape = (len(ts_array), len(users))
+        base_prod = np.where(daylight, rng.uniform(0.2, 1.2, shape), rng.uniform(0.0, 0.2, shape))
+        base_cons = np.where(daylight, rng.uniform(0.4, 0.9, shape), rng.uniform(0.2, 0.6, shape))
 
-                prod = max(0.0, round(base_prod + random.uniform(-0.15, 0.15), 3))
-                cons = max(0.0, round(base_cons + random.uniform(-0.15, 0.15), 3))
+        prod = np.clip(np.round(base_prod + rng.uniform(-0.15, 0.15, shape), 3), 0.0, None)
+        cons = np.clip(np.round(base_cons + rng.uniform(-0.15, 0.15, shape), 3), 0.0, None)
 
-                services.record_meter_sample(db, user_id=u.id, prod_kwh=prod, cons_kwh=cons, ts=ts)
+        # Flatten into dict rows and bulk-insert: one INSERT per batch
+        # instead of INSERT + COMMIT + SELECT per sample.
+        user_ids = [u.id for u in users]
+        rows: list[dict] = []
+        for i, ts in enumerate(ts_array.tolist()):
+            for uid, p, c in zip(user_ids, prod[i].tolist(), cons[i].tolist()):
+                rows.append({
+                    "user_id": uid,
+                    "production_kwh": p,
+                    "consumption_kwh": c,
+                    "ts": ts,
+                })
+                if len(rows) >= INSERT_BATCH_SIZE:
+                    db.bulk_insert_mappings(MeterSample, rows)
+                    rows.clear()
 
-            ts += STEP_SECONDS
+        if rows:
+            db.bulk_insert_mappings(MeterSample, rows)
+        db.commit()
 
         print("✅ Done seeding history.")
     finally: